@@ -1,9 +1,23 @@
 import streamlit as st
 import pandas as pd
 import io
+import csv
 import time
 from datetime import datetime
 import os
+import pathlib
+import threading
+import uuid
+import zipfile
+from io import BytesIO
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterator, NamedTuple
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+import xxhash
 
 # Set page configuration
 st.set_page_config(
@@ -12,33 +26,255 @@ st.set_page_config(
     layout="wide"
 )
 
-# Import your automation modules
-# Note: You'll need to adapt these imports based on your actual script structure
-try:
-    # If your scripts are in a package
-    from automation_scripts import (
-        auto_fill_supplier_order,
-        process_supplier_excel,
-        convert_pdf_to_ecrs
+# One timestamp per script run, shared by captions, file names and log entries
+class _RunClock(NamedTuple):
+    now: datetime
+    file_stamp: str    # 20240131_093000
+    file_date: str     # 20240131
+    date: str          # 2024-01-31
+    display: str       # 2024-01-31 09:30:00
+    year: int
+
+def _clock() -> _RunClock:
+    """Take the current run's timestamp and pre-format every variant the page uses"""
+    now = datetime.now()
+    return _RunClock(
+        now=now,
+        file_stamp=now.strftime('%Y%m%d_%H%M%S'),
+        file_date=now.strftime('%Y%m%d'),
+        date=now.strftime('%Y-%m-%d'),
+        display=now.strftime('%Y-%m-%d %H:%M:%S'),
+        year=now.year
     )
-except ImportError:
-    # Fallback: Define dummy functions for testing
-    st.warning("⚠️ Automation scripts not found. Using demo mode.")
-    
-    def auto_fill_supplier_order(excel_file, supplier_name, store_id):
-        """Dummy function for Task 1"""
-        time.sleep(1)  # Simulate processing
-        return f"Order for {supplier_name} (Store: {store_id}) processed successfully."
+
+_run = _clock()
+
+# Fallback: Define dummy functions for testing
+def _demo_auto_fill_supplier_order(excel_file, supplier_name, store_id):
+    """Dummy function for Task 1"""
+    time.sleep(1)  # Simulate processing
+    return f"Order for {supplier_name} (Store: {store_id}) processed successfully."
+
+def _demo_process_supplier_excel(input_file, output_format):
+    """Dummy function for Task 2"""
+    time.sleep(1)
+    return pd.DataFrame({"Item": ["Demo1", "Demo2"], "Quantity": [10, 20]})
+
+def _demo_convert_pdf_to_ecrs_iter(pdf_file, store_id, supplier_name) -> Iterator[str]:
+    """Dummy streaming function for Task 3 (yields the TXT one invoice line at a time)"""
+    time.sleep(1)
+    yield "INVOICE_DATA\n"
+    yield "ITEM1,10,100\n"
+    yield "ITEM2,5,200"
+
+def _demo_convert_pdf_to_ecrs(pdf_file, store_id, supplier_name):
+    """Dummy function for Task 3 (pdf_file is a file-like object, e.g. io.BytesIO)"""
+    return "".join(_demo_convert_pdf_to_ecrs_iter(pdf_file, store_id, supplier_name))
+
+class _Automation(NamedTuple):
+    auto_fill_supplier_order: Callable
+    process_supplier_excel: Callable
+    convert_pdf_to_ecrs: Callable
+    convert_pdf_to_ecrs_iter: Callable
+    demo_mode: bool = False
+
+# Import your automation modules once per server process (they may pull in selenium etc.)
+# Note: You'll need to adapt these imports based on your actual script structure
+@st.cache_resource
+def _get_automation():
+    """Return the automation functions, or the demo ones (demo_mode=True) if the package is missing"""
+    try:
+        # If your scripts are in a package
+        from automation_scripts import (
+            auto_fill_supplier_order,
+            process_supplier_excel,
+            convert_pdf_to_ecrs
+        )
+    except ImportError:
+        return _Automation(
+            _demo_auto_fill_supplier_order,
+            _demo_process_supplier_excel,
+            _demo_convert_pdf_to_ecrs,
+            _demo_convert_pdf_to_ecrs_iter,
+            demo_mode=True
+        )
     
-    def process_supplier_excel(input_file, output_format):
-        """Dummy function for Task 2"""
-        time.sleep(1)
-        return pd.DataFrame({"Item": ["Demo1", "Demo2"], "Quantity": [10, 20]})
+    try:
+        from automation_scripts import convert_pdf_to_ecrs_iter
+    except ImportError:
+        # No streaming converter yet; wrap the string-returning one
+        def convert_pdf_to_ecrs_iter(pdf_file, store_id, supplier_name):
+            yield convert_pdf_to_ecrs(pdf_file=pdf_file, store_id=store_id, supplier_name=supplier_name)
     
-    def convert_pdf_to_ecrs(pdf_file, store_id, supplier_name):
-        """Dummy function for Task 3"""
-        time.sleep(1)
-        return "INVOICE_DATA\nITEM1,10,100\nITEM2,5,200"
+    return _Automation(auto_fill_supplier_order, process_supplier_excel, convert_pdf_to_ecrs, convert_pdf_to_ecrs_iter)
+
+if _get_automation().demo_mode:
+    st.warning("⚠️ Automation scripts not found. Using demo mode.")
+
+# Prefer the Rust-based calamine reader; fall back to openpyxl if it isn't installed
+try:
+    import python_calamine  # noqa: F401
+    ENGINE = "calamine"
+except ImportError:
+    ENGINE = "openpyxl"
+
+def _upload_key(data: bytes) -> str:
+    """xxh3 digest of an upload, passed to the cached functions below as their content key.
+
+    Streamlit skips hashing underscore-prefixed parameters, so the raw bytes
+    themselves never go through its (slower) default hasher.
+    """
+    return xxhash.xxh3_64_hexdigest(data)
+
+# Cache parsed uploads so widget-triggered reruns don't re-read the Excel file
+@st.cache_data(show_spinner=False)
+def _load_excel(_file_bytes: bytes, file_key: str, name: str, nrows=None) -> pd.DataFrame:
+    """Parse uploaded Excel bytes once per upload (keyed on file_key and name)"""
+    return pd.read_excel(io.BytesIO(_file_bytes), nrows=nrows, engine=ENGINE)
+
+@st.cache_data(show_spinner=False)
+def _count_excel_rows(_file_bytes: bytes, file_key: str, name: str) -> int:
+    """Count data rows without loading the sheet into a DataFrame"""
+    if not name.lower().endswith(('.xlsx', '.xlsm')):
+        # openpyxl can't open legacy .xls; count via a full parse instead
+        return len(_load_excel(_file_bytes, file_key, name))
+    from openpyxl import load_workbook
+    workbook = load_workbook(io.BytesIO(_file_bytes), read_only=True)
+    try:
+        # Sheet 0 is what pd.read_excel previews (.active is the last-selected sheet)
+        sheet = workbook.worksheets[0]
+        if sheet.max_row is None:
+            # No <dimension> record (e.g. openpyxl write_only output); scan the rows for it
+            sheet.calculate_dimension(force=True)
+        return max(sheet.max_row - 1, 0)
+    finally:
+        workbook.close()
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _convert_cached(_pdf_bytes: bytes, pdf_key: str, store_id: str, supplier: str, fmt: str, tax: bool, split: bool) -> str:
+    """Convert a PDF invoice once per (file, store, supplier, ECRS settings) combination"""
+    return _get_automation().convert_pdf_to_ecrs(pdf_file=io.BytesIO(_pdf_bytes), store_id=store_id, supplier_name=supplier)
+
+def _spool_ecrs(convert_pdf_to_ecrs_iter, pdf_buffer, store_id: str, supplier: str):
+    """Stream one invoice's ECRS TXT into a spooled temp file (spills to disk past 1 MB)
+
+    Runs on pool worker threads, so the converter is looked up on the script
+    thread and passed in rather than fetched from the Streamlit cache here.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=1 << 20, mode='w+b')
+    try:
+        for chunk in convert_pdf_to_ecrs_iter(pdf_file=pdf_buffer, store_id=store_id, supplier_name=supplier):
+            spooled.write(chunk.encode('utf-8'))
+    except Exception:
+        spooled.close()
+        raise
+    spooled.seek(0)
+    return spooled
+
+# The log is shared by every session on this server, so appends, compaction
+# and reads are serialised through one process-wide lock
+@st.cache_resource
+def _log_lock() -> threading.Lock:
+    return threading.Lock()
+
+def _compact_log_partition(partition: pathlib.Path) -> None:
+    """Merge a partition's one-row part files into one file once there are too many"""
+    parts = sorted(partition.glob('*.parquet'))
+    if len(parts) <= LOG_COMPACT_FILES:
+        return
+    merged = pq.read_table(parts)
+    # uuid4 name, like write_to_dataset's part files, so it can never collide with a file in parts
+    pq.write_table(merged, partition / f"compacted-{uuid.uuid4().hex}.parquet", compression='zstd')
+    for part in parts:
+        part.unlink()
+
+def _append_activity(entry: dict) -> None:
+    """Append one activity entry to the on-disk parquet log"""
+    with _log_lock():
+        pq.write_to_dataset(
+            pa.Table.from_pylist([entry]),
+            root_path=LOG_PATH,
+            partition_cols=['task'],
+            compression='zstd'
+        )
+        _compact_log_partition(LOG_PATH / f"task={entry['task']}")
+    _load_log.clear()
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _load_log() -> pd.DataFrame:
+    """Read the activity log back in time order (empty until something has been logged)"""
+    if not LOG_PATH.exists():
+        return pd.DataFrame()
+    with _log_lock():
+        log_df = pq.read_table(LOG_PATH).to_pandas()
+    # Part files come back in file-name order, not the order they were written
+    return log_df.sort_values('timestamp', ignore_index=True)
+
+def _is_valid_pdf(pdf_file) -> bool:
+    """Cheap header/trailer sniff so corrupt or oversized uploads never reach the extractor"""
+    buf = pdf_file.getbuffer()
+    return (
+        1024 < len(buf) <= MAX_PDF_BYTES
+        and bytes(buf[:5]) == b'%PDF-'
+        and b'%%EOF' in bytes(buf[-1024:])
+    )
+
+def _to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """Encode df as CSV, using pyarrow's writer when the output is known to match to_csv.
+
+    The pyarrow path only handles frames whose cells are all non-empty strings
+    (like the activity report). pyarrow formats floats, booleans, timestamps,
+    nulls and empty strings differently, so any other frame, and any value that
+    needs quotes, goes through df.to_csv instead.
+    """
+    all_strings = len(df.columns) > 0 and all(
+        pd.api.types.infer_dtype(df[col], skipna=False) == 'string' for col in df.columns
+    )
+    if not all_strings or (df.isna() | (df == '')).any().any():
+        return df.to_csv(index=False).encode('utf-8')
+    
+    # pyarrow quotes the header unconditionally, so write it with the csv module
+    # (what to_csv uses) and the body without quoting
+    header = io.StringIO()
+    csv.writer(header, lineterminator='\n').writerow(df.columns)
+    sink = io.BytesIO(header.getvalue().encode('utf-8'))
+    sink.seek(0, io.SEEK_END)
+    try:
+        pacsv.write_csv(
+            pa.Table.from_pandas(df, preserve_index=False),
+            sink,
+            write_options=pacsv.WriteOptions(include_header=False, quoting_style="none")
+        )
+    except pa.ArrowInvalid:
+        # A value contains a comma, quote or newline and needs quoting
+        return df.to_csv(index=False).encode('utf-8')
+    return sink.getvalue()
+
+def _shrink(df: pd.DataFrame) -> pd.DataFrame:
+    """Return a display copy with compact dtypes to keep the Arrow payload small"""
+    df = df.copy()
+    # 'string' covers pandas 3's default str dtype, which 'object' alone will stop matching
+    for col in df.select_dtypes(include=['object', 'string']):
+        try:
+            if df[col].nunique() / max(len(df), 1) < 0.5:
+                df[col] = df[col].astype('category')
+        except TypeError:
+            # Unhashable cell values can't be categorised; leave the column as is
+            pass
+    for col in df.select_dtypes('integer'):
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    for col in df.select_dtypes('float64'):
+        df[col] = pd.to_numeric(df[col], downcast='float')
+    return df
+
+PREVIEW_ROWS = 20
+SUPPLIER_PREVIEW_ROWS = 200
+LOG_PATH = pathlib.Path(__file__).parent / "activity_log.parquet"
+LOG_COMPACT_FILES = 32
+MAX_PDF_WORKERS = 8
+MAX_PDF_BYTES = 25 * 1024 * 1024
+STORE_ICON_PATH = pathlib.Path(__file__).parent / "assets" / "store_icon.png"
+STORE_ICON_URL = "https://cdn-icons-png.flaticon.com/512/3082/3082383.png"
 
 # Initialize session state for multi-step processes
 if 'current_task' not in st.session_state:
@@ -50,7 +286,8 @@ if 'uploaded_files' not in st.session_state:
 
 # Sidebar - Store Selection and Navigation
 with st.sidebar:
-    st.image("https://cdn-icons-png.flaticon.com/512/3082/3082383.png", width=100)
+    # Served from the repo when the asset is shipped; the CDN is only a fallback
+    st.image(str(STORE_ICON_PATH) if STORE_ICON_PATH.exists() else STORE_ICON_URL, width=100)
     st.title("Store Dashboard")
     
     # Store selection
@@ -73,7 +310,7 @@ with st.sidebar:
     
     # User info (in real app, this would be from login)
     st.write(f"👤 User: **Admin**")
-    st.write(f"📅 Date: {datetime.now().strftime('%Y-%m-%d')}")
+    st.write(f"📅 Date: {_run.date}")
     
     st.divider()
     
@@ -105,7 +342,11 @@ tab1, tab2, tab3, tab4 = st.tabs([
 ])
 
 # TAB 1: Auto-Fill Supplier Orders
-with tab1:
+@st.fragment
+def _render_tab1(selected_store):
+    # Fragment reruns skip the module top, so take this run's timestamp here
+    _run = _clock()
+    
     st.header("Task 1: Auto-Fill Supplier Orders")
     st.markdown("Upload your order Excel and automatically fill supplier websites")
     
@@ -133,13 +374,18 @@ with tab1:
             key="order_excel"
         )
         
+        # Read the upload once; every consumer below reuses these bytes
+        order_bytes = uploaded_file.getvalue() if uploaded_file else None
+        order_key = _upload_key(order_bytes) if uploaded_file else None
+        
         if uploaded_file:
             # Preview the Excel file
             try:
-                df = pd.read_excel(uploaded_file)
+                preview_df = _load_excel(order_bytes, order_key, uploaded_file.name, nrows=PREVIEW_ROWS)
                 st.subheader("Order Preview")
-                st.dataframe(df.head(), use_container_width=True)
-                st.caption(f"Total Items: {len(df)} | File: {uploaded_file.name}")
+                st.dataframe(_shrink(preview_df), use_container_width=True)
+                total_items = _count_excel_rows(order_bytes, order_key, uploaded_file.name)
+                st.caption(f"Total Items: {total_items} | File: {uploaded_file.name}")
             except Exception as e:
                 st.error(f"Error reading file: {e}")
     
@@ -162,45 +408,62 @@ with tab1:
                 with st.spinner("Processing order..."):
                     # Call your automation function
                     try:
-                        result = auto_fill_supplier_order(
-                            excel_file=uploaded_file,
+                        result = _get_automation().auto_fill_supplier_order(
+                            excel_file=io.BytesIO(order_bytes),
                             supplier_name=selected_supplier,
                             store_id=selected_store
                         )
                         
-                        st.success("✅ Order processed successfully!")
-                        
-                        # Show results
-                        st.subheader("Processing Results")
-                        st.json({"supplier": selected_supplier, "store": selected_store, "status": "completed"})
-                        
-                        # Download confirmation
-                        confirmation_text = f"Order confirmation for {selected_supplier}\nStore: {selected_store}\nTimestamp: {datetime.now()}"
-                        st.download_button(
-                            label="📥 Download Confirmation",
-                            data=confirmation_text,
-                            file_name=f"order_confirmation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                            mime="text/plain"
-                        )
-                        
                         # Log activity
-                        if 'activity_log' not in st.session_state:
-                            st.session_state.activity_log = []
-                        st.session_state.activity_log.append({
-                            "timestamp": datetime.now(),
+                        _append_activity({
+                            "timestamp": _run.now,
                             "task": "order_fill",
                             "supplier": selected_supplier,
                             "store": selected_store,
                             "file": uploaded_file.name
                         })
                         
+                        # Keep the results for the full-app rerun below
+                        st.session_state.last_order = {
+                            "supplier": selected_supplier,
+                            "store": selected_store,
+                            "timestamp": _run.now,
+                            "file_stamp": _run.file_stamp
+                        }
+                        
                     except Exception as e:
                         st.error(f"❌ Processing failed: {str(e)}")
+                
+                # Rerun the whole app (not just this fragment) so the Activity Log tab shows the entry
+                if 'last_order' in st.session_state:
+                    st.rerun(scope="app")
             else:
                 st.warning("Please upload a file and select a supplier")
+        
+        # Results of the order just processed, shown once after the rerun
+        last_order = st.session_state.pop('last_order', None)
+        if last_order:
+            st.success("✅ Order processed successfully!")
+            
+            # Show results
+            st.subheader("Processing Results")
+            st.json({"supplier": last_order["supplier"], "store": last_order["store"], "status": "completed"})
+            
+            # Download confirmation
+            confirmation_text = f"Order confirmation for {last_order['supplier']}\nStore: {last_order['store']}\nTimestamp: {last_order['timestamp']}"
+            st.download_button(
+                label="📥 Download Confirmation",
+                data=confirmation_text,
+                file_name=f"order_confirmation_{last_order['file_stamp']}.txt",
+                mime="text/plain"
+            )
+
+with tab1:
+    _render_tab1(selected_store)
 
 # TAB 2: Process Supplier Excel Sheets
-with tab2:
+@st.fragment
+def _render_tab2():
     st.header("Task 2: Process Supplier Excel Sheets")
     st.markdown("Standardize supplier Excel sheets to your format")
     
@@ -215,24 +478,41 @@ with tab2:
             key="supplier_excel"
         )
         
+        supplier_bytes = uploaded_excel.getvalue() if uploaded_excel else None
+        supplier_key = _upload_key(supplier_bytes) if uploaded_excel else None
+        
         if uploaded_excel:
             try:
-                df = pd.read_excel(uploaded_excel)
-                st.subheader("Original Supplier Format")
-                st.dataframe(df, use_container_width=True)
+                df = _load_excel(supplier_bytes, supplier_key, uploaded_excel.name)
+                # Capped at SUPPLIER_PREVIEW_ROWS so each rerun ships a bounded Arrow payload
+                with st.expander("Preview original supplier format"):
+                    st.dataframe(_shrink(df.head(SUPPLIER_PREVIEW_ROWS)), use_container_width=True)
                 
                 # Column mapping interface
                 st.subheader("Column Mapping")
                 if len(df.columns) > 0:
-                    mapping = {}
-                    for col in df.columns:
-                        mapping[col] = st.selectbox(
-                            f"Map '{col}' to:",
-                            ["Item Name", "Quantity", "Price", "SKU", "Unit", "Ignore"],
-                            key=f"map_{col}"
-                        )
+                    # One editable table instead of a selectbox per column
+                    map_df = pd.DataFrame({
+                        "source": df.columns.astype(str),
+                        "target": "Ignore"
+                    })
+                    edited = st.data_editor(
+                        map_df,
+                        column_config={
+                            "source": st.column_config.TextColumn("Supplier Column", disabled=True),
+                            "target": st.column_config.SelectboxColumn(
+                                "Map to",
+                                options=["Item Name", "Quantity", "Price", "SKU", "Unit", "Ignore"],
+                                required=True
+                            )
+                        },
+                        num_rows="fixed",
+                        hide_index=True,
+                        use_container_width=True,
+                        key=f"col_map_{uploaded_excel.name}"
+                    )
                     
-                    st.session_state.column_mapping = mapping
+                    st.session_state.column_mapping = dict(zip(df.columns, edited["target"]))
             except Exception as e:
                 st.error(f"Error: {e}")
     
@@ -251,8 +531,8 @@ with tab2:
                 with st.spinner("Converting format..."):
                     try:
                         # Call your processing function
-                        processed_df = process_supplier_excel(
-                            input_file=uploaded_excel,
+                        processed_df = _get_automation().process_supplier_excel(
+                            input_file=io.BytesIO(supplier_bytes),
                             output_format=output_format
                         )
                         
@@ -260,11 +540,11 @@ with tab2:
                         
                         # Show processed data
                         st.subheader("Converted Format")
-                        st.dataframe(processed_df, use_container_width=True)
+                        st.dataframe(_shrink(processed_df), use_container_width=True)
                         
                         # Download button
                         output = io.BytesIO()
-                        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+                        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
                             processed_df.to_excel(writer, index=False, sheet_name='Processed')
                         
                         st.download_button(
@@ -279,8 +559,15 @@ with tab2:
             else:
                 st.warning("Please upload a file first")
 
+with tab2:
+    _render_tab2()
+
 # TAB 3: Convert PDF Invoices to ECRS
-with tab3:
+@st.fragment
+def _render_tab3(selected_store):
+    # Fragment reruns skip the module top, so take this run's timestamp here
+    _run = _clock()
+    
     st.header("Task 3: Convert PDF Invoices to ECRS Format")
     st.markdown("Upload supplier PDF invoices and convert to ECRS-compatible TXT files")
     
@@ -332,10 +619,15 @@ with tab3:
             if st.button("🧾 Convert Single Invoice", type="primary", use_container_width=True):
                 with st.spinner("Extracting data from PDF..."):
                     try:
-                        txt_content = convert_pdf_to_ecrs(
-                            pdf_file=uploaded_pdf,
-                            store_id=selected_store,
-                            supplier_name=invoice_supplier
+                        pdf_bytes = uploaded_pdf.getvalue()
+                        txt_content = _convert_cached(
+                            pdf_bytes,
+                            _upload_key(pdf_bytes),
+                            selected_store,
+                            invoice_supplier,
+                            ecrs_format,
+                            include_tax,
+                            split_categories
                         )
                         
                         st.success("✅ PDF converted successfully!")
@@ -348,7 +640,7 @@ with tab3:
                         st.download_button(
                             label="📥 Download TXT for ECRS",
                             data=txt_content,
-                            file_name=f"ecrs_import_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                            file_name=f"ecrs_import_{_run.file_stamp}.txt",
                             mime="text/plain"
                         )
                         
@@ -358,42 +650,82 @@ with tab3:
         # Process button for multiple files
         if multiple_files and len(multiple_files) > 0:
             if st.button(f"🔄 Convert {len(multiple_files)} Invoices", type="primary", use_container_width=True):
-                progress_bar = st.progress(0)
-                results = []
-                
-                for i, pdf_file in enumerate(multiple_files):
-                    try:
-                        txt_content = convert_pdf_to_ecrs(
-                            pdf_file=pdf_file,
-                            store_id=selected_store,
-                            supplier_name=invoice_supplier
-                        )
-                        results.append((pdf_file.name, txt_content))
-                    except Exception as e:
-                        results.append((pdf_file.name, f"ERROR: {str(e)}"))
-                    
-                    progress_bar.progress((i + 1) / len(multiple_files))
+                valid_files, skipped_files = [], []
+                for pdf_file in multiple_files:
+                    if _is_valid_pdf(pdf_file):
+                        valid_files.append(pdf_file)
+                    else:
+                        skipped_files.append(pdf_file.name)
+                if skipped_files:
+                    st.warning(f"⚠️ Skipped {len(skipped_files)} invalid or oversized PDF(s): {', '.join(skipped_files)}")
+                if not valid_files:
+                    # Nothing left to convert; don't show progress or an empty ZIP
+                    return
                 
-                st.success(f"✅ Processed {len(multiple_files)} invoices!")
+                convert_pdf_to_ecrs_iter = _get_automation().convert_pdf_to_ecrs_iter
+                progress_bar = st.progress(0)
+                # Pre-sized and filled by index, so the summary keeps upload order
+                batch_status = [None] * len(valid_files)
                 
-                # Create zip file for multiple results
-                import zipfile
-                from io import BytesIO
+                # Write each result into the zip as soon as it is ready
+                try:
+                    import zlib  # noqa: F401
+                    zip_compression = zipfile.ZIP_DEFLATED
+                except ImportError:
+                    zip_compression = zipfile.ZIP_STORED
                 
                 zip_buffer = BytesIO()
-                with zipfile.ZipFile(zip_buffer, 'w') as zip_file:
-                    for filename, content in results:
-                        zip_file.writestr(f"{filename.replace('.pdf', '.txt')}", content)
+                with zipfile.ZipFile(zip_buffer, 'w', compression=zip_compression, compresslevel=1) as zip_file, \
+                        ThreadPoolExecutor(max_workers=min(MAX_PDF_WORKERS, os.cpu_count() or 1)) as pool:
+                    # Convert files concurrently; progress advances as each one finishes
+                    futures = {
+                        pool.submit(
+                            _spool_ecrs,
+                            convert_pdf_to_ecrs_iter,
+                            io.BytesIO(pdf_file.getvalue()),
+                            selected_store,
+                            invoice_supplier
+                        ): i
+                        for i, pdf_file in enumerate(valid_files)
+                    }
+                    
+                    for done, future in enumerate(as_completed(futures), start=1):
+                        i = futures[future]
+                        pdf_file = valid_files[i]
+                        entry_name = f"{pdf_file.name.replace('.pdf', '.txt')}"
+                        try:
+                            spooled = future.result()
+                        except Exception as e:
+                            zip_file.writestr(entry_name, f"ERROR: {str(e)}")
+                            batch_status[i] = (pdf_file.name, f"❌ {str(e)}")
+                        else:
+                            # Copy in chunks so the full TXT never sits in memory as one string
+                            with spooled, zip_file.open(entry_name, 'w') as entry:
+                                shutil.copyfileobj(spooled, entry)
+                            batch_status[i] = (pdf_file.name, "✅")
+                        
+                        progress_bar.progress(done / len(valid_files))
+                
+                st.success(f"✅ Processed {len(valid_files)} invoices!")
+                st.dataframe(
+                    pd.DataFrame(batch_status, columns=["File", "Status"]),
+                    use_container_width=True,
+                    hide_index=True
+                )
                 
                 st.download_button(
                     label="📦 Download All as ZIP",
                     data=zip_buffer.getvalue(),
-                    file_name=f"ecrs_batch_{datetime.now().strftime('%Y%m%d')}.zip",
+                    file_name=f"ecrs_batch_{_run.file_date}.zip",
                     mime="application/zip"
                 )
 
+with tab3:
+    _render_tab3(selected_store)
+
 # TAB 4: Activity Log
-with tab4:
+@st.fragment
+def _render_tab4():
     st.header("📈 Activity Log & Reports")
     
     # Summary metrics
@@ -420,23 +752,29 @@ with tab4:
         {"time": "01:15 PM", "action": "PDF converted", "supplier": "Supplier A", "user": "Sarah", "status": "✅"},
     ]
     
+    # Show recorded activity once there is some, otherwise the samples above
+    logged_df = _load_log()
+    activities_df = logged_df if not logged_df.empty else pd.DataFrame(sample_activities)
     st.dataframe(
-        pd.DataFrame(sample_activities),
+        _shrink(activities_df),
         use_container_width=True,
         hide_index=True
     )
     
-    # Export options
+    # Export options (pyarrow writes the CSV bytes directly)
     st.download_button(
         label="📊 Export Activity Report",
-        data=pd.DataFrame(sample_activities).to_csv(index=False).encode('utf-8'),
+        data=_to_csv_bytes(activities_df),
         file_name="activity_report.csv",
         mime="text/csv"
     )
 
+with tab4:
+    _render_tab4()
+
 # Footer
 st.markdown("---")
-st.caption(f"© {datetime.now().year} Grocery Store Automation Suite | Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+st.caption(f"© {_run.year} Grocery Store Automation Suite | Last updated: {_run.display}")
 
 # Instructions for deployment
 with st.expander("🚀 Deployment Instructions"):
@@ -457,13 +795,18 @@ with st.expander("🚀 Deployment Instructions"):
            pass
        ```
     
-    4. **Test locally**:
+    4. **Ship the sidebar icon** so it isn't fetched from the CDN:
+       ```bash
+       curl --create-dirs -o assets/store_icon.png https://cdn-icons-png.flaticon.com/512/3082/3082383.png
+       ```
+    
+    5. **Test locally**:
        ```bash
        pip install -r requirements.txt
        streamlit run app.py
        ```
     
-    5. **Deploy to Streamlit Cloud**:
+    6. **Deploy to Streamlit Cloud**:
        - Push to GitHub
        - Go to [share.streamlit.io](https://share.streamlit.io)
        - Connect your repo